@@ -1,12 +1,12 @@
 #!/usr/bin/env python3
 
 import os
+import pickle
+from multiprocessing import Pool
 from pathlib import Path
-from zipfile import ZipFile
 
-import openmc.deplete
-
-from utils import download
+from utils import (chain_cache_path, download_all, export_chain_xml,
+                   extract, scan_files)
 
 
 URLS = [
@@ -16,26 +16,35 @@ URLS = [
 ]
 
 def main():
+    # Deferred since importing openmc takes a second or two
+    import openmc.data
+    import openmc.deplete
+
+    # One directory read covers all three sublibrary checks
+    with os.scandir(".") as it:
+        local_dirs = {e.name for e in it if e.is_dir()}
+
     endf_dir = os.environ.get("OPENMC_ENDF_DATA")
     if endf_dir is not None:
         endf_dir = Path(endf_dir)
-    elif all(os.path.isdir(lib) for lib in ("neutrons", "decay", "nfy")):
+    elif local_dirs >= {"neutrons", "decay", "nfy"}:
         endf_dir = Path(".")
     else:
-        for url in URLS:
-            basename = download(url)
-            with ZipFile(basename, 'r') as zf:
-                print('Extracting {}...'.format(basename))
-                zf.extractall()
+        # Each archive is extracted as soon as it arrives, overlapping
+        # with the remaining downloads
+        download_all(URLS, on_complete=extract)
         endf_dir = Path(".")
 
-    decay_files = list((endf_dir / "decay").glob("*endf"))
-    neutron_files = list((endf_dir / "neutrons").glob("*endf"))
-    nfy_files = list((endf_dir / "nfy").glob("*endf"))
+    decay_dir = endf_dir / "decay"
+    neutron_dir = endf_dir / "neutrons"
+
+    decay_files = scan_files(decay_dir, "endf")
+    neutron_files = scan_files(neutron_dir, "endf")
+    nfy_files = scan_files(endf_dir / "nfy", "endf")
 
     # Remove erroneous Be7 evaluation that can cause problems
-    decay_files.remove(endf_dir / "decay" / "dec-004_Be_007.endf")
-    neutron_files.remove(endf_dir / "neutrons" / "n-004_Be_007.endf")
+    decay_files.remove(decay_dir / "dec-004_Be_007.endf")
+    neutron_files.remove(neutron_dir / "n-004_Be_007.endf")
 
     # check files exist
     for flist, ftype in [(decay_files, "decay"), (neutron_files, "neutron"),
@@ -43,8 +52,24 @@ def main():
         if not flist:
             raise IOError("No {} endf files found in {}".format(ftype, endf_dir))
 
-    chain = openmc.deplete.Chain.from_endf(decay_files, nfy_files, neutron_files)
-    chain.export_to_xml('chain_endfb71.xml')
+    # Reuse a previously parsed chain if none of the input files changed
+    cache_path = chain_cache_path(decay_files + nfy_files + neutron_files)
+    if cache_path.is_file():
+        print('Loading cached chain from {}...'.format(cache_path))
+        with open(cache_path, 'rb') as fh:
+            chain = pickle.load(fh)
+    else:
+        # Parse the decay and fission yield evaluations across all cores;
+        # Chain.from_endf accepts pre-parsed evaluations for these. The
+        # neutron files stay as paths since only their headers are read.
+        with Pool() as pool:
+            decay_files = pool.map(openmc.data.endf.Evaluation, decay_files)
+            nfy_files = pool.map(openmc.data.endf.Evaluation, nfy_files)
+
+        chain = openmc.deplete.Chain.from_endf(decay_files, nfy_files, neutron_files)
+        with open(cache_path, 'wb') as fh:
+            pickle.dump(chain, fh)
+    export_chain_xml(chain, 'chain_endfb71.xml')
 
 
 if __name__ == '__main__':
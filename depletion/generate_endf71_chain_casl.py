@@ -1,8 +1,6 @@
 #!/usr/bin/env python3
 
-import glob
 import os
-from zipfile import ZipFile
 from collections import OrderedDict, defaultdict
 from io import StringIO
 from itertools import chain
@@ -22,7 +20,7 @@ from openmc.deplete.nuclide import Nuclide, DecayTuple, ReactionTuple, \
     FissionYieldDistribution
 
 from casl_chain import CASL_CHAIN, UNMODIFIED_DECAY_BR
-from utils import download
+from utils import download_all, extract, scan_files
 
 URLS = [
     'https://www.nndc.bnl.gov/endf-b7.1/zips/ENDF-B-VII.1-neutrons.zip',
@@ -59,21 +57,23 @@ def replace_missing_decay_product(product, decay_data, all_decay_data):
 
 
 def main():
-    if os.path.isdir('./decay') and os.path.isdir('./nfy') and os.path.isdir('./neutrons'):
+    # One directory read covers all three sublibrary checks
+    with os.scandir('.') as it:
+        local_dirs = {e.name for e in it if e.is_dir()}
+
+    if local_dirs >= {'decay', 'nfy', 'neutrons'}:
         endf_dir = '.'
     elif 'OPENMC_ENDF_DATA' in os.environ:
         endf_dir = os.environ['OPENMC_ENDF_DATA']
     else:
-        for url in URLS:
-            basename = download(url)
-            with ZipFile(basename, 'r') as zf:
-                print('Extracting {}...'.format(basename))
-                zf.extractall()
+        # Each archive is extracted as soon as it arrives, overlapping
+        # with the remaining downloads
+        download_all(URLS, on_complete=extract)
         endf_dir = '.'
 
-    decay_files = glob.glob(os.path.join(endf_dir, 'decay', '*.endf'))
-    fpy_files = glob.glob(os.path.join(endf_dir, 'nfy', '*.endf'))
-    neutron_files = glob.glob(os.path.join(endf_dir, 'neutrons', '*.endf'))
+    decay_files = scan_files(os.path.join(endf_dir, 'decay'), '.endf')
+    fpy_files = scan_files(os.path.join(endf_dir, 'nfy'), '.endf')
+    neutron_files = scan_files(os.path.join(endf_dir, 'neutrons'), '.endf')
 
     # Create a Chain
     chain = openmc.deplete.Chain()
@@ -1,12 +1,13 @@
 #!/usr/bin/env python3
 
 import argparse
+import os
+import pickle
+from multiprocessing import Pool
 from pathlib import Path
-from zipfile import ZipFile
 
-from openmc.deplete import Chain
-
-from utils import download
+from utils import (chain_cache_path, download_all, export_chain_xml,
+                   extract, scan_files)
 
 URLS = [
     'https://www.nndc.bnl.gov/endf-b8.0/zips/ENDF-B-VIII.0_neutrons.zip',
@@ -16,17 +17,23 @@ URLS = [
 
 
 def main(chain_path, release, endf_path=None):
+    # Deferred since importing openmc takes a second or two, which
+    # makes --help sluggish if done at module level
+    import openmc.data
+    from openmc.deplete import Chain
+
+    # One directory read covers all three sublibrary checks
+    with os.scandir(".") as it:
+        local_dirs = {e.name for e in it if e.is_dir()}
+
     if endf_path is not None:
         endf_path = Path(endf_path)
-    elif all(Path(lib).is_dir() for lib in ("neutrons", "decay", "nfy")):
+    elif local_dirs >= {"neutrons", "decay", "nfy"}:
         endf_path = Path(".")
     else:
-        # Download and extract zip files
-        for url in URLS:
-            basename = download(url)
-            with ZipFile(basename, 'r') as zf:
-                print(f'Extracting {basename}...')
-                zf.extractall()
+        # Download zip files, extracting each as soon as it arrives so
+        # extraction overlaps with the remaining downloads
+        download_all(URLS, on_complete=extract)
 
         # Rename extracted directories
         Path('ENDF-B-VIII.0_decay').rename('decay')
@@ -34,9 +41,9 @@ def main(chain_path, release, endf_path=None):
         Path('ENDF-B-VIII.0_nfy').rename('nfy')
         endf_path = Path.cwd()
 
-    decay_files = list((endf_path / "decay").glob("*endf"))
-    neutron_files = list((endf_path / "neutrons").glob("*endf"))
-    nfy_files = list((endf_path / "nfy").glob("*endf"))
+    decay_files = scan_files(endf_path / "decay", "endf")
+    neutron_files = scan_files(endf_path / "neutrons", "endf")
+    nfy_files = scan_files(endf_path / "nfy", "endf")
 
     # check files exist
     for flist, ftype in [(decay_files, "decay"), (neutron_files, "neutron"),
@@ -44,8 +51,24 @@ def main(chain_path, release, endf_path=None):
         if not flist:
             raise IOError(f"No {ftype} endf files found in {endf_path}")
 
-    chain = Chain.from_endf(decay_files, nfy_files, neutron_files)
-    chain.export_to_xml(chain_path)
+    # Reuse a previously parsed chain if none of the input files changed
+    cache_path = chain_cache_path(decay_files + nfy_files + neutron_files)
+    if cache_path.is_file():
+        print(f'Loading cached chain from {cache_path}...')
+        with open(cache_path, 'rb') as fh:
+            chain = pickle.load(fh)
+    else:
+        # Parse the decay and fission yield evaluations across all cores;
+        # Chain.from_endf accepts pre-parsed evaluations for these. The
+        # neutron files stay as paths since only their headers are read.
+        with Pool() as pool:
+            decay_files = pool.map(openmc.data.endf.Evaluation, decay_files)
+            nfy_files = pool.map(openmc.data.endf.Evaluation, nfy_files)
+
+        chain = Chain.from_endf(decay_files, nfy_files, neutron_files)
+        with open(cache_path, 'wb') as fh:
+            pickle.dump(chain, fh)
+    export_chain_xml(chain, chain_path)
 
 
 if __name__ == '__main__':
@@ -10,14 +10,13 @@ library should be used for decay and FPY evaluations and defaults to JEFF 3.3.
 from argparse import ArgumentParser
 import json
 import os
+import pickle
+from multiprocessing import Pool
 from pathlib import Path
-import tarfile
-from zipfile import ZipFile
+from shutil import copyfileobj
 
-import openmc.deplete as dep
-import openmc.data
-
-from utils import download
+from utils import (chain_cache_path, download, export_chain_xml, extract,
+                   scan_files, stream_download_and_extract)
 
 
 NEUTRON_LIB = 'https://tendl.web.psi.ch/tendl_2019/tar_files/TENDL-n.tgz'
@@ -31,30 +30,16 @@ NFY_LIB = {
 }
 
 
-def extract(filename, path=".", verbose=True):
-    # Determine function to open archive
-    if Path(filename).suffix == '.zip':
-        func = ZipFile
-    else:
-        func = tarfile.open
-
-    # Open archive and extract files
-    with func(filename, 'r') as fh:
-        if verbose:
-            print(f'Extracting {filename}...')
-        fh.extractall(path)
-
-
 def fix_jeff33_nfy(path):
     print(f'Fixing TPID in {path}...')
     new_path = path.with_name(path.name + '_fixed')
     if not new_path.exists():
-        with path.open('r') as f:
-            data = f.read()
-        with new_path.open('w') as f:
-            # Write missing TPID line
-            f.write(" "*66 + "   1 0  0    0\n")
-            f.write(data)
+        # Prepend the missing TPID record and copy the rest through in
+        # large binary blocks, without text decoding or loading the
+        # whole file into memory
+        with path.open('rb') as src, new_path.open('wb') as dst:
+            dst.write(b" "*66 + b"   1 0  0    0\n")
+            copyfileobj(src, dst, 4*1024*1024)
     return new_path
 
 
@@ -65,6 +50,11 @@ def main():
                         help='Library to use for decay and fission product yields')
     args = parser.parse_args()
 
+    # Deferred since importing openmc takes a second or two, which
+    # makes --help sluggish if done at module level
+    import openmc.data
+    import openmc.deplete as dep
+
     # Setup output directories
     endf_dir = Path("tendl-download")
     neutron_dir = endf_dir / "neutrons"
@@ -74,8 +64,17 @@ def main():
     # ==========================================================================
     # Incident neutron data
 
-    neutron_tgz = download(NEUTRON_LIB, output_path=endf_dir)
-    extract(neutron_tgz, neutron_dir)
+    # Extract the neutron library as it downloads rather than writing
+    # the multi-hundred-MB tarball to disk first. A stamp file written
+    # only once extraction has finished marks the directory complete, so
+    # a previous run's files are reused but an interrupted extraction is
+    # redone rather than silently accepted.
+    stamp = neutron_dir / '.extracted.stamp'
+    if stamp.is_file():
+        print(f'Skipping {NEUTRON_LIB}, already extracted')
+    else:
+        stream_download_and_extract(NEUTRON_LIB, neutron_dir)
+        stamp.write_text(NEUTRON_LIB + '\n')
 
     # Get list of transport nuclides in TENDL-2019
     with open('tendl2019_nuclides.json', 'r') as fh:
@@ -83,7 +82,7 @@ def main():
 
     neutron_files = [
         p
-        for p in (endf_dir / "neutrons").glob("*.tendl")
+        for p in scan_files(neutron_dir, ".tendl")
         if p.name[2:-6] in transport_nuclides  # filename is n-XXNNN.tendl
     ]
 
@@ -95,22 +94,49 @@ def main():
 
     extract(decay_zip, decay_dir)
     if args.lib == 'jeff33':
-        decay_files = list(decay_dir.glob('*.ASC'))
+        decay_files = scan_files(decay_dir, '.ASC')
 
         nfy_file_fixed = fix_jeff33_nfy(nfy_file)
-        nfy_files = openmc.data.endf.get_evaluations(nfy_file_fixed)
 
     elif args.lib == 'endf80':
-        decay_files = list(decay_dir.rglob('*.endf'))
+        decay_files = scan_files(decay_dir, '.endf')
 
         extract(nfy_file, nfy_dir)
-        nfy_files = list(nfy_dir.rglob('*.endf'))
+        nfy_files = scan_files(nfy_dir, '.endf')
 
-    chain = dep.Chain.from_endf(
-        decay_files, nfy_files, neutron_files,
-        reactions=dep.chain.REACTIONS.keys()
-    )
-    chain.export_to_xml(f'chain_tendl2019_{args.lib}.xml')
+    # Reuse a previously parsed chain if none of the input files changed.
+    # The JEFF 3.3 yields are keyed by their single source file since
+    # they are passed in as parsed evaluations.
+    if args.lib == 'jeff33':
+        nfy_sources = [nfy_file_fixed]
+    else:
+        nfy_sources = nfy_files
+    cache_path = chain_cache_path(decay_files + nfy_sources + neutron_files)
+    if cache_path.is_file():
+        print(f'Loading cached chain from {cache_path}...')
+        with open(cache_path, 'rb') as fh:
+            chain = pickle.load(fh)
+    else:
+        # Parse the decay (and ENDF/B yield) evaluations across all
+        # cores; Chain.from_endf accepts pre-parsed evaluations for these
+        with Pool() as pool:
+            decay_files = pool.map(openmc.data.endf.Evaluation, decay_files)
+            if args.lib == 'endf80':
+                nfy_files = pool.map(openmc.data.endf.Evaluation, nfy_files)
+
+        if args.lib == 'jeff33':
+            # The JEFF 3.3 yields all live in one file; parsing it is
+            # the most expensive step in this script, so it only happens
+            # on a cache miss (the cache key uses the file itself)
+            nfy_files = openmc.data.endf.get_evaluations(nfy_file_fixed)
+
+        chain = dep.Chain.from_endf(
+            decay_files, nfy_files, neutron_files,
+            reactions=dep.chain.REACTIONS.keys()
+        )
+        with open(cache_path, 'wb') as fh:
+            pickle.dump(chain, fh)
+    export_chain_xml(chain, f'chain_tendl2019_{args.lib}.xml')
 
 
 if __name__ == '__main__':
@@ -8,16 +8,27 @@ neutron, incident photon, and thermal scattering data.
 
 
 import argparse
+import json
+import os
 import sys
 import tarfile
 import zipfile
-from multiprocessing import Pool
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from fnmatch import fnmatch
+from functools import lru_cache
+import multiprocessing
 from pathlib import Path
-from shutil import rmtree, copy, copyfileobj
+from shutil import rmtree, copyfileobj
 
 import openmc.data
 from utils import download, process_neutron, process_thermal
 
+try:
+    from isal import igzip
+    _have_isal = True
+except ImportError:
+    _have_isal = False
+
 # Make sure Python version is sufficient
 assert sys.version_info >= (3, 6), "Python 3.6+ is required"
 
@@ -27,6 +38,198 @@ class CustomFormatter(argparse.ArgumentDefaultsHelpFormatter,
     pass
 
 
+# This dictionary contains all the unique information about each release. This
+# can be extended to accommodate new releases. Only static metadata lives
+# here; globbed paths are derived in main() once extraction has run.
+RELEASE_DETAILS = {
+    'vii.1': {
+        'neutron': {
+            'base_url': 'http://www.nndc.bnl.gov/endf-b7.1/zips/',
+            'compressed_files': ['ENDF-B-VII.1-neutrons.zip',
+                                'ENDF-B-VII.1-thermal_scatt.zip'],
+            'checksums': ['e5d7f441fc4c92893322c24d1725e29c',
+                        'fe590109dde63b2ec5dc228c7b8cab02'],
+            'file_type': 'endf',
+            'endf_files': 'n-*.endf',
+            'sab_files': (
+                ('n-001_H_001.endf', 'tsl-HinH2O.endf'),
+                ('n-001_H_001.endf', 'tsl-HinCH2.endf'),
+                ('n-001_H_001.endf', 'tsl-HinZrH.endf'),
+                ('n-001_H_001.endf', 'tsl-ortho-H.endf'),
+                ('n-001_H_001.endf', 'tsl-para-H.endf'),
+                ('n-001_H_001.endf', 'tsl-benzine.endf'),
+                ('n-001_H_001.endf', 'tsl-l-CH4.endf'),
+                ('n-001_H_001.endf', 'tsl-s-CH4.endf'),
+                ('n-001_H_002.endf', 'tsl-DinD2O.endf'),
+                ('n-001_H_002.endf', 'tsl-ortho-D.endf'),
+                ('n-001_H_002.endf', 'tsl-para-D.endf'),
+                ('n-004_Be_009.endf', 'tsl-BeinBeO.endf'),
+                ('n-004_Be_009.endf', 'tsl-Be-metal.endf'),
+                ('n-006_C_000.endf', 'tsl-graphite.endf'),
+                ('n-008_O_016.endf', 'tsl-OinBeO.endf'),
+                ('n-008_O_016.endf', 'tsl-OinUO2.endf'),
+                ('n-013_Al_027.endf', 'tsl-013_Al_027.endf'),
+                ('n-026_Fe_056.endf', 'tsl-026_Fe_056.endf'),
+                ('n-014_Si_028.endf', 'tsl-SiO2.endf'),
+                ('n-040_Zr_090.endf', 'tsl-ZrinZrH.endf'),
+                ('n-092_U_238.endf', 'tsl-UinUO2.endf')
+            ),
+            'compressed_file_size': 226,
+            'uncompressed_file_size': 916
+        },
+        'photon': {
+            'base_url': 'http://www.nndc.bnl.gov/endf-b7.1/zips/',
+            'compressed_files': ['ENDF-B-VII.1-photoat.zip',
+                                'ENDF-B-VII.1-atomic_relax.zip'],
+            'checksums': ['5192f94e61f0b385cf536f448ffab4a4',
+                        'fddb6035e7f2b6931e51a58fc754bd10'],
+            'file_type': 'endf',
+            'photo_files': 'photoat*.endf',
+            'atom_files': 'atom*.endf',
+            'compressed_file_size': 9,
+            'uncompressed_file_size': 45
+        },
+        'wmp': {
+            'base_url': 'https://github.com/mit-crpg/WMP_Library/releases/download/v1.1/',
+            'compressed_files': ['WMP_Library_v1.1.tar.gz'],
+            'file_type': 'wmp',
+            'compressed_file_size': 12,
+            'uncompressed_file_size': 17
+        }
+    },
+    'viii.0': {
+        'neutron': {
+            'base_url': 'https://www.nndc.bnl.gov/endf-b8.0/',
+            'compressed_files': ['zips/ENDF-B-VIII.0_neutrons.zip',
+                                'zips/ENDF-B-VIII.0_thermal_scatt.zip',
+                                'erratafiles/n-005_B_010.endf'],
+            'checksums': ['90c1b1a6653a148f17cbf3c5d1171859',
+                        'ecd503d3f8214f703e95e17cc947062c',
+                        'eaf71eb22258f759abc205a129d8715a'],
+            'file_type': 'endf',
+            'endf_files': 'n-*.endf',
+            'sab_files': (
+                ('n-001_H_001.endf', 'tsl-HinC5O2H8.endf'),
+                ('n-001_H_001.endf', 'tsl-HinH2O.endf'),
+                ('n-001_H_001.endf', 'tsl-HinCH2.endf'),
+                ('n-001_H_001.endf', 'tsl-HinZrH.endf'),
+                ('n-001_H_001.endf', 'tsl-HinIceIh.endf'),
+                ('n-001_H_001.endf', 'tsl-HinYH2.endf'),
+                ('n-001_H_001.endf', 'tsl-ortho-H.endf'),
+                ('n-001_H_001.endf', 'tsl-para-H.endf'),
+                ('n-001_H_001.endf', 'tsl-benzene.endf'),
+                ('n-001_H_001.endf', 'tsl-l-CH4.endf'),
+                ('n-001_H_001.endf', 'tsl-s-CH4.endf'),
+                ('n-001_H_002.endf', 'tsl-DinD2O.endf'),
+                ('n-001_H_002.endf', 'tsl-ortho-D.endf'),
+                ('n-001_H_002.endf', 'tsl-para-D.endf'),
+                ('n-004_Be_009.endf', 'tsl-BeinBeO.endf'),
+                ('n-004_Be_009.endf', 'tsl-Be-metal.endf'),
+                ('n-006_C_012.endf', 'tsl-CinSiC.endf'),
+                ('n-006_C_012.endf', 'tsl-crystalline-graphite.endf'),
+                ('n-006_C_012.endf', 'tsl-reactor-graphite-10P.endf'),
+                ('n-006_C_012.endf', 'tsl-reactor-graphite-30P.endf'),
+                ('n-007_N_014.endf', 'tsl-NinUN.endf'),
+                ('n-008_O_016.endf', 'tsl-OinBeO.endf'),
+                ('n-008_O_016.endf', 'tsl-OinD2O.endf'),
+                ('n-008_O_016.endf', 'tsl-OinIceIh.endf'),
+                ('n-008_O_016.endf', 'tsl-OinUO2.endf'),
+                ('n-013_Al_027.endf', 'tsl-013_Al_027.endf'),
+                ('n-026_Fe_056.endf', 'tsl-026_Fe_056.endf'),
+                ('n-014_Si_028.endf', 'tsl-SiinSiC.endf'),
+                ('n-014_Si_028.endf', 'tsl-SiO2-alpha.endf'),
+                ('n-014_Si_028.endf', 'tsl-SiO2-beta.endf'),
+                ('n-039_Y_089.endf', 'tsl-YinYH2.endf'),
+                ('n-040_Zr_090.endf', 'tsl-ZrinZrH.endf'),
+                ('n-092_U_238.endf', 'tsl-UinUN.endf'),
+                ('n-092_U_238.endf', 'tsl-UinUO2.endf')
+            ),
+            'compressed_file_size': 296+59+0.849,
+            'uncompressed_file_size': 999999
+        },
+        'photon': {
+            'base_url': 'https://www.nndc.bnl.gov/endf-b8.0/',
+            'compressed_files': ['zips/ENDF-B-VIII.0_photoat.zip',
+                                'erratafiles/atomic_relax.tar.gz'],
+            'checksums': ['d49f5b54be278862e1ce742ccd94f5c0',
+                        '805f877c59ad22dcf57a0446d266ceea'],
+            'file_type': 'endf',
+            'photo_files': 'photoat*.endf',
+            'atom_files': 'atom*.endf',
+            'compressed_file_size': 1.2+35,
+            'uncompressed_file_size': 999999
+        }
+    }
+}
+
+
+def worker_init():
+    """Pay the heavy openmc import once per worker instead of once per
+    submitted task."""
+    import openmc.data  # noqa: F401
+
+
+def task_input(task):
+    """Primary input file of a (function, args) processing task: the
+    S(a,b) evaluation for thermal jobs, the evaluation itself otherwise."""
+    func, func_args = task
+    return func_args[1] if func is process_thermal else func_args[0]
+
+
+def process_star(task):
+    """Run one (function, args) task, returning (input file, error) so
+    neutron and thermal jobs share a single imap_unordered feed and a
+    failing evaluation is reported instead of aborting the whole run."""
+    func, func_args = task
+    try:
+        func(*func_args)
+    except Exception as e:
+        return (str(task_input(task)), repr(e))
+    return (str(task_input(task)), None)
+
+
+def process_photon(photo_path, atom_path, output_dir, libver):
+    """Convert one pair of photoatomic/atomic relaxation evaluations to
+    HDF5, returning the path of the file produced."""
+    import openmc.data
+    print('Converting:', photo_path.name, atom_path.name)
+    data = openmc.data.IncidentPhoton.from_endf(photo_path, atom_path)
+
+    h5_file = output_dir / f'{data.name}.h5'
+    data.export_to_hdf5(h5_file, 'w', libver=libver)
+    return h5_file
+
+
+def copy_plain_file(src, dst):
+    """Copy a file with an in-kernel range copy where available, so the
+    data never round-trips through a user-space buffer."""
+    with open(src, 'rb') as s, open(dst, 'wb') as d:
+        try:
+            while os.copy_file_range(s.fileno(), d.fileno(), 1 << 30) > 0:
+                pass
+        except (AttributeError, OSError):
+            # Non-Linux, or a filesystem pairing the kernel cannot copy
+            # across (EXDEV on older kernels, CIFS/FUSE targets)
+            s.seek(0)
+            d.seek(0)
+            d.truncate()
+            copyfileobj(s, d, 4 * 1024 * 1024)
+
+
+def extract_zip_member(zip_path, info, dst_dir):
+    """Extract a single zip member into dst_dir without its folder
+    structure. Takes a ZipInfo so open() skips the by-name central
+    directory lookup; the archive is reopened since zipfile handles
+    cannot be shared across processes."""
+    with zipfile.ZipFile(zip_path) as zipf:
+        source = zipf.open(info)
+        # Copy in 4 MiB blocks straight to an unbuffered handle; the
+        # default 64 KiB buffer costs ~100x more read/write syscalls
+        target = open(dst_dir / Path(info.filename).name, "wb", buffering=0)
+        with source, target:
+            copyfileobj(source, target, 4 * 1024 * 1024)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description=__doc__,
@@ -61,6 +264,14 @@ def main():
     parser.add_argument('--no-cleanup', dest='cleanup', action='store_false',
                         help="Do not remove download directories when data has "
                         "been processed")
+    parser.add_argument('--retry-failed', action='store_true',
+                        help="Only process the files recorded in "
+                        "failed.json by a previous run")
+    parser.add_argument('--parallel-downloads', type=int, default=1,
+                        metavar='N', help="Split each download into N "
+                        "concurrent HTTP range requests. Only useful on "
+                        "high-latency links; leave at 1 to be gentle on "
+                        "the data servers")
     parser.add_argument('--temperatures', type=float,
                         default=[250.0, 293.6, 600.0, 900.0, 1200.0, 2500.0],
                         help="Temperatures in Kelvin", nargs='+')
@@ -68,155 +279,64 @@ def main():
     args = parser.parse_args()
 
 
+    @lru_cache(maxsize=None)
+    def _zam(stem):
+        # zam() regex-parses the nuclide name; memoize so each stem is
+        # parsed at most once no matter how often it is sorted
+        return openmc.data.zam(stem)
+
     def sort_key(path):
         if path.name.startswith('c_'):
             # Ensure that thermal scattering gets sorted after neutron data
             return (1000, path)
         else:
-            return openmc.data.zam(path.stem)
+            return _zam(path.stem)
 
 
     library_name = 'endfb'
 
     cwd = Path.cwd()
 
-    endf_files_dir = cwd.joinpath('-'.join([library_name, args.release, 'endf']))
+    endf_files_dir = cwd / f'{library_name}-{args.release}-endf'
     neutron_dir = endf_files_dir / 'neutron'
     thermal_dir = endf_files_dir / 'thermal_scatt'
-    download_path = cwd.joinpath('-'.join([library_name, args.release, 'download']))
+    download_path = cwd / f'{library_name}-{args.release}-download'
     # the destination is decided after the release is known
     # to avoid putting the release in a folder with a misleading name
     if args.destination is None:
-        args.destination = Path('-'.join([library_name, args.release, 'hdf5']))
-
-    # This dictionary contains all the unique information about each release. This
-    # can be extended to accommodate new releases
-    release_details = {
-        'vii.1': {
-            'neutron': {
-                'base_url': 'http://www.nndc.bnl.gov/endf-b7.1/zips/',
-                'compressed_files': ['ENDF-B-VII.1-neutrons.zip',
-                                    'ENDF-B-VII.1-thermal_scatt.zip'],
-                'checksums': ['e5d7f441fc4c92893322c24d1725e29c',
-                            'fe590109dde63b2ec5dc228c7b8cab02'],
-                'file_type': 'endf',
-                'endf_files': neutron_dir.rglob('n-*.endf'),
-                'sab_files': [
-                    (neutron_dir / 'n-001_H_001.endf', neutron_dir / 'tsl-HinH2O.endf'),
-                    (neutron_dir / 'n-001_H_001.endf', neutron_dir / 'tsl-HinCH2.endf'),
-                    (neutron_dir / 'n-001_H_001.endf', neutron_dir / 'tsl-HinZrH.endf'),
-                    (neutron_dir / 'n-001_H_001.endf', neutron_dir / 'tsl-ortho-H.endf'),
-                    (neutron_dir / 'n-001_H_001.endf', neutron_dir / 'tsl-para-H.endf'),
-                    (neutron_dir / 'n-001_H_001.endf', neutron_dir / 'tsl-benzine.endf'),
-                    (neutron_dir / 'n-001_H_001.endf', neutron_dir / 'tsl-l-CH4.endf'),
-                    (neutron_dir / 'n-001_H_001.endf', neutron_dir / 'tsl-s-CH4.endf'),
-                    (neutron_dir / 'n-001_H_002.endf', neutron_dir / 'tsl-DinD2O.endf'),
-                    (neutron_dir / 'n-001_H_002.endf', neutron_dir / 'tsl-ortho-D.endf'),
-                    (neutron_dir / 'n-001_H_002.endf', neutron_dir / 'tsl-para-D.endf'),
-                    (neutron_dir / 'n-004_Be_009.endf', neutron_dir / 'tsl-BeinBeO.endf'),
-                    (neutron_dir / 'n-004_Be_009.endf', neutron_dir / 'tsl-Be-metal.endf'),
-                    (neutron_dir / 'n-006_C_000.endf', neutron_dir / 'tsl-graphite.endf'),
-                    (neutron_dir / 'n-008_O_016.endf', neutron_dir / 'tsl-OinBeO.endf'),
-                    (neutron_dir / 'n-008_O_016.endf', neutron_dir / 'tsl-OinUO2.endf'),
-                    (neutron_dir / 'n-013_Al_027.endf', neutron_dir / 'tsl-013_Al_027.endf'),
-                    (neutron_dir / 'n-026_Fe_056.endf', neutron_dir / 'tsl-026_Fe_056.endf'),
-                    (neutron_dir / 'n-014_Si_028.endf', neutron_dir / 'tsl-SiO2.endf'),
-                    (neutron_dir / 'n-040_Zr_090.endf', neutron_dir / 'tsl-ZrinZrH.endf'),
-                    (neutron_dir / 'n-092_U_238.endf', neutron_dir / 'tsl-UinUO2.endf')
-                ],
-                'compressed_file_size': 226,
-                'uncompressed_file_size': 916
-            },
-            'photon': {
-                'base_url': 'http://www.nndc.bnl.gov/endf-b7.1/zips/',
-                'compressed_files': ['ENDF-B-VII.1-photoat.zip',
-                                    'ENDF-B-VII.1-atomic_relax.zip'],
-                'checksums': ['5192f94e61f0b385cf536f448ffab4a4',
-                            'fddb6035e7f2b6931e51a58fc754bd10'],
-                'file_type': 'endf',
-                'photo_files': endf_files_dir.joinpath('photon').rglob('photoat*.endf'),
-                'atom_files': endf_files_dir.joinpath('photon').rglob('atom*.endf'),
-                'compressed_file_size': 9,
-                'uncompressed_file_size': 45
-            },
-            'wmp': {
-                'base_url': 'https://github.com/mit-crpg/WMP_Library/releases/download/v1.1/',
-                'compressed_files': ['WMP_Library_v1.1.tar.gz'],
-                'file_type': 'wmp',
-                'compressed_file_size': 12,
-                'uncompressed_file_size': 17
-            }
-        },
-        'viii.0': {
-            'neutron': {
-                'base_url': 'https://www.nndc.bnl.gov/endf-b8.0/',
-                'compressed_files': ['zips/ENDF-B-VIII.0_neutrons.zip',
-                                    'zips/ENDF-B-VIII.0_thermal_scatt.zip',
-                                    'erratafiles/n-005_B_010.endf'],
-                'checksums': ['90c1b1a6653a148f17cbf3c5d1171859',
-                            'ecd503d3f8214f703e95e17cc947062c',
-                            'eaf71eb22258f759abc205a129d8715a'],
-                'file_type': 'endf',
-                'endf_files': neutron_dir.rglob('n-*.endf'),
-                'sab_files': [
-                    (neutron_dir / 'n-001_H_001.endf', neutron_dir / 'tsl-HinC5O2H8.endf'),
-                    (neutron_dir / 'n-001_H_001.endf', neutron_dir / 'tsl-HinH2O.endf'),
-                    (neutron_dir / 'n-001_H_001.endf', neutron_dir / 'tsl-HinCH2.endf'),
-                    (neutron_dir / 'n-001_H_001.endf', neutron_dir / 'tsl-HinZrH.endf'),
-                    (neutron_dir / 'n-001_H_001.endf', neutron_dir / 'tsl-HinIceIh.endf'),
-                    (neutron_dir / 'n-001_H_001.endf', neutron_dir / 'tsl-HinYH2.endf'),
-                    (neutron_dir / 'n-001_H_001.endf', neutron_dir / 'tsl-ortho-H.endf'),
-                    (neutron_dir / 'n-001_H_001.endf', neutron_dir / 'tsl-para-H.endf'),
-                    (neutron_dir / 'n-001_H_001.endf', neutron_dir / 'tsl-benzene.endf'),
-                    (neutron_dir / 'n-001_H_001.endf', neutron_dir / 'tsl-l-CH4.endf'),
-                    (neutron_dir / 'n-001_H_001.endf', neutron_dir / 'tsl-s-CH4.endf'),
-                    (neutron_dir / 'n-001_H_002.endf', neutron_dir / 'tsl-DinD2O.endf'),
-                    (neutron_dir / 'n-001_H_002.endf', neutron_dir / 'tsl-ortho-D.endf'),
-                    (neutron_dir / 'n-001_H_002.endf', neutron_dir / 'tsl-para-D.endf'),
-                    (neutron_dir / 'n-004_Be_009.endf', neutron_dir / 'tsl-BeinBeO.endf'),
-                    (neutron_dir / 'n-004_Be_009.endf', neutron_dir / 'tsl-Be-metal.endf'),
-                    (neutron_dir / 'n-006_C_012.endf', neutron_dir / 'tsl-CinSiC.endf'),
-                    (neutron_dir / 'n-006_C_012.endf', neutron_dir / 'tsl-crystalline-graphite.endf'),
-                    (neutron_dir / 'n-006_C_012.endf', neutron_dir / 'tsl-reactor-graphite-10P.endf'),
-                    (neutron_dir / 'n-006_C_012.endf', neutron_dir / 'tsl-reactor-graphite-30P.endf'),
-                    (neutron_dir / 'n-007_N_014.endf', neutron_dir / 'tsl-NinUN.endf'),
-                    (neutron_dir / 'n-008_O_016.endf', neutron_dir / 'tsl-OinBeO.endf'),
-                    (neutron_dir / 'n-008_O_016.endf', neutron_dir / 'tsl-OinD2O.endf'),
-                    (neutron_dir / 'n-008_O_016.endf', neutron_dir / 'tsl-OinIceIh.endf'),
-                    (neutron_dir / 'n-008_O_016.endf', neutron_dir / 'tsl-OinUO2.endf'),
-                    (neutron_dir / 'n-013_Al_027.endf', neutron_dir / 'tsl-013_Al_027.endf'),
-                    (neutron_dir / 'n-026_Fe_056.endf', neutron_dir / 'tsl-026_Fe_056.endf'),
-                    (neutron_dir / 'n-014_Si_028.endf', neutron_dir / 'tsl-SiinSiC.endf'),
-                    (neutron_dir / 'n-014_Si_028.endf', neutron_dir / 'tsl-SiO2-alpha.endf'),
-                    (neutron_dir / 'n-014_Si_028.endf', neutron_dir / 'tsl-SiO2-beta.endf'),
-                    (neutron_dir / 'n-039_Y_089.endf', neutron_dir / 'tsl-YinYH2.endf'),
-                    (neutron_dir / 'n-040_Zr_090.endf', neutron_dir / 'tsl-ZrinZrH.endf'),
-                    (neutron_dir / 'n-092_U_238.endf', neutron_dir / 'tsl-UinUN.endf'),
-                    (neutron_dir / 'n-092_U_238.endf', neutron_dir / 'tsl-UinUO2.endf')
-                ],
-                'compressed_file_size': 296+59+0.849,
-                'uncompressed_file_size': 999999
-            },
-            'photon': {
-                'base_url': 'https://www.nndc.bnl.gov/endf-b8.0/',
-                'compressed_files': ['zips/ENDF-B-VIII.0_photoat.zip',
-                                    'erratafiles/atomic_relax.tar.gz'],
-                'checksums': ['d49f5b54be278862e1ce742ccd94f5c0',
-                            '805f877c59ad22dcf57a0446d266ceea'],
-                'file_type': 'endf',
-                'photo_files': endf_files_dir.joinpath('photon').rglob('photoat*.endf'),
-                'atom_files': endf_files_dir.joinpath('photon').rglob('atom*.endf'),
-                'compressed_file_size': 1.2+35,
-                'uncompressed_file_size': 999999
-            }
-        }
-    }
+        args.destination = Path(f'{library_name}-{args.release}-hdf5')
+
+    # One worker pool shared by archive extraction and NJOY processing.
+    # Every phase submits into it, so workers are spawned (and openmc
+    # imported) once per run rather than once per phase. The forkserver
+    # start method forks workers from a small server process that has
+    # openmc.data preloaded: spawning stays cheap, threads in the main
+    # process can't poison the fork, and workers don't copy-on-write the
+    # parent's full heap.
+    ctx = multiprocessing.get_context('forkserver')
+    ctx.set_forkserver_preload(['openmc.data', 'utils'])
+    pool = ctx.Pool(initializer=worker_init)
+
+
+    def resolve_files(particle, *keys):
+        """Materialize the glob patterns stored in release_details as
+        sorted lists of paths, partitioning all patterns in a single
+        directory walk rather than one rglob traversal per pattern."""
+        details = RELEASE_DETAILS[args.release][particle]
+        matches = {key: [] for key in keys}
+        for dirpath, _dirnames, filenames in os.walk(endf_files_dir / particle):
+            for name in filenames:
+                for key in keys:
+                    if fnmatch(name, details[key]):
+                        matches[key].append(Path(dirpath) / name)
+        lists = [sorted(matches[key]) for key in keys]
+        return lists[0] if len(lists) == 1 else lists
 
     compressed_file_size, uncompressed_file_size = 0, 0
     for r in args.release:
         for p in args.particles:
-            compressed_file_size += release_details[args.release][p]['compressed_file_size']
-            uncompressed_file_size += release_details[args.release][p]['uncompressed_file_size']
+            compressed_file_size += RELEASE_DETAILS[args.release][p]['compressed_file_size']
+            uncompressed_file_size += RELEASE_DETAILS[args.release][p]['uncompressed_file_size']
 
     download_warning = """
     WARNING: This script will download up to {} MB of data. Extracting and
@@ -228,66 +348,134 @@ def main():
 
 
     # ==============================================================================
-    # DOWNLOAD FILES FROM NNDC SITE
+    # DOWNLOAD AND EXTRACT FILES FROM NNDC SITE
 
-    if args.download:
-        print(download_warning)
-        for particle in args.particles:
-            details = release_details[args.release][particle]
-            for i, f in enumerate(details['compressed_files']):
-                url = details['base_url'] + f
-                if 'checksums' in details.keys():
-                    checksum = details['checksums'][i]
-                    downloaded_file = download(url,
-                                            output_path=download_path / particle,
-                                            checksum=checksum)
-                else:
-                    downloaded_file = download(url,
-                                            output_path=download_path / particle,
-                                            )
+    # Downloads and extractions run as a pipeline: each archive is handed
+    # to an extraction worker as soon as its transfer completes, so the
+    # CPU inflates one archive while the network fetches the next
 
-    # ==============================================================================
-    # EXTRACT FILES FROM TGZ
+    if args.download or args.extract:
+        if args.download:
+            print(download_warning)
 
-    if args.extract:
+        # Flatten the per-particle file lists into one job list
+        jobs = []
         for particle in args.particles:
-
-            if release_details[args.release][particle]['file_type'] == 'wmp':
-                extraction_dir = args.destination / particle
-            elif release_details[args.release][particle]['file_type'] == 'endf':
-                extraction_dir = endf_files_dir / particle
-            Path.mkdir(extraction_dir, parents=True, exist_ok=True)
-
-            for f in release_details[args.release][particle]['compressed_files']:
-                fname = Path(f).name
-                # Extract files different depending on compression method
-                if fname.endswith('.zip'):
-                    print(f'Extracting {fname}...')
-                    with zipfile.ZipFile(download_path / particle / fname) as zipf:
-                        # Extracts files without folder structure in the zip file
-                        for member in zipf.namelist():
-                            filename = Path(member).name
-                            # skip directories
-                            if not filename:
-                                continue
-                            source = zipf.open(member)
-                            target = open(extraction_dir / filename, "wb")
-                            with source, target:
-                                copyfileobj(source, target)
-                elif fname.endswith('.tar.gz'):
-                    with tarfile.open(download_path / particle / fname, 'r') as tgz:
-                        print(f'Extracting {fname}...')
-                        # extract files ignoring the internal folder structure
-                        for member in tgz.getmembers():
-                            if member.isreg():
-                                member.name = Path(member.name).name
-                                tgz.extract(member, path=extraction_dir)
+            details = RELEASE_DETAILS[args.release][particle]
+            checksums = details.get('checksums')
+            for i, f in enumerate(details['compressed_files']):
+                checksum = checksums[i] if checksums else None
+                jobs.append((particle, Path(f).name,
+                             details['base_url'] + f, checksum))
+
+        def extraction_dir_for(particle):
+            if RELEASE_DETAILS[args.release][particle]['file_type'] == 'wmp':
+                return args.destination / particle
+            elif RELEASE_DETAILS[args.release][particle]['file_type'] == 'endf':
+                return endf_files_dir / particle
+
+        def extract_archive(particle, fname):
+            extraction_dir = extraction_dir_for(particle)
+            archive_path = download_path / particle / fname
+
+            # A stamp file keyed on the archive's size and mtime marks a
+            # completed extraction, so unchanged archives are not
+            # re-inflated on repeated runs
+            st = archive_path.stat()
+            stamp = extraction_dir / f'.extracted-{fname}.stamp'
+            token = f'{st.st_size}:{st.st_mtime_ns}'
+            if not fname.endswith(('.zip', '.tar.gz')):
+                # File is not compressed. Used for erratafiles; the copy is
+                # deferred until all archives have been extracted so the
+                # erratafile reliably overwrites the original
+                return (particle, fname)
+            if stamp.is_file() and stamp.read_text() == token:
+                print(f'Skipping {fname}, already extracted')
+                return None
+
+            # Extract files different depending on compression method
+            if fname.endswith('.zip'):
+                print(f'Extracting {fname}...')
+                zip_path = archive_path
+                with zipfile.ZipFile(zip_path) as zipf:
+                    # One pass over the already-parsed central directory;
+                    # directory entries are skipped and the ZipInfo
+                    # objects are reused rather than re-looked-up by name
+                    members = [i for i in zipf.infolist()
+                               if not i.is_dir() and Path(i.filename).name]
+                # Member decompression is CPU-bound and independent, so
+                # inflate across the worker pool
+                tasks = [(zip_path, info, extraction_dir) for info in members]
+                chunksize = max(1, len(tasks) // (4 * (os.cpu_count() or 1)))
+                pool.starmap(extract_zip_member, tasks, chunksize=chunksize)
+            else:
+                # Feed the decompressor through a large buffered reader
+                # with kernel readahead hinted, so gzip sees a few big
+                # sequential reads instead of many small ones
+                fileobj = open(archive_path, 'rb', buffering=4*1024*1024)
+                if hasattr(os, 'posix_fadvise'):
+                    os.posix_fadvise(fileobj.fileno(), 0, 0,
+                                     os.POSIX_FADV_SEQUENTIAL)
+                if _have_isal:
+                    # ISA-L's SIMD inflate decompresses gzip several
+                    # times faster than stdlib zlib
+                    fileobj = igzip.IGzipFile(fileobj=fileobj)
+                    mode = 'r|'
                 else:
-                    # File is not compressed. Used for erratafiles. This ensures
-                    # the n-005_B_010.endf erratafile overwrites the orginal
-                    copy(download_path/particle/fname, extraction_dir/fname)
-
-        if args.cleanup and download_path.exists():
+                    mode = 'r|gz'
+                # Streaming mode decompresses the archive exactly once in
+                # a single forward pass; getmembers() on a random-access
+                # handle would scan (and re-inflate) it twice
+                with tarfile.open(fileobj=fileobj, mode=mode) as tgz:
+                    print(f'Extracting {fname}...')
+                    # extract files ignoring the internal folder structure
+                    for member in tgz:
+                        if member.isreg():
+                            member.name = Path(member.name).name
+                            tgz.extract(member, path=extraction_dir)
+            stamp.write_text(token)
+            return None
+
+        if args.extract:
+            for particle in args.particles:
+                Path.mkdir(extraction_dir_for(particle), parents=True,
+                           exist_ok=True)
+
+        plain_files = []
+        with ThreadPoolExecutor(max_workers=4) as dl_pool, \
+                ThreadPoolExecutor() as ex_pool:
+            extract_futures = []
+            if args.download:
+                dl_futures = {
+                    dl_pool.submit(download, url,
+                                   output_path=download_path / particle,
+                                   checksum=checksum,
+                                   parts=args.parallel_downloads):
+                        (particle, fname)
+                    for particle, fname, url, checksum in jobs}
+                for fut in as_completed(dl_futures):
+                    fut.result()
+                    if args.extract:
+                        particle, fname = dl_futures[fut]
+                        extract_futures.append(
+                            ex_pool.submit(extract_archive, particle, fname))
+            elif args.extract:
+                extract_futures = [
+                    ex_pool.submit(extract_archive, particle, fname)
+                    for particle, fname, _, _ in jobs]
+
+            for fut in extract_futures:
+                plain_file = fut.result()
+                if plain_file is not None:
+                    plain_files.append(plain_file)
+
+        # Copy uncompressed erratafiles last. This ensures the
+        # n-005_B_010.endf erratafile overwrites the orginal
+        for particle, fname in plain_files:
+            copy_plain_file(download_path / particle / fname,
+                            extraction_dir_for(particle) / fname)
+
+        if args.extract and args.cleanup and download_path.exists():
             rmtree(download_path)
 
     # =========================================================================
@@ -302,30 +490,57 @@ def main():
 
     if 'neutron' in args.particles:
         particle = 'neutron'
-        with Pool() as pool:
-            details = release_details[args.release][particle]
-            results = []
-            for filename in details['endf_files']:
-
-                # Skip neutron evaluation that fails the processing stage
-                if filename.name == 'n-000_n_001.endf':
-                    continue
-
-                func_args = (filename, args.destination / particle, args.libver,
-                            args.temperatures)
-                r = pool.apply_async(process_neutron, func_args)
-                results.append(r)
-
-            for path_neutron, path_thermal in details['sab_files']:
-                func_args = (path_neutron, path_thermal,
-                            args.destination / particle, args.libver)
-                r = pool.apply_async(process_thermal, func_args)
-                results.append(r)
-
-            for r in results:
-                r.wait()
-
-        for p in sorted((args.destination / particle).glob('*.h5'), key=sort_key):
+        details = RELEASE_DETAILS[args.release][particle]
+        dest_dir = args.destination / particle
+        tasks = []
+        for filename in resolve_files(particle, 'endf_files'):
+
+            # Skip neutron evaluation that fails the processing stage
+            if filename.name == 'n-000_n_001.endf':
+                continue
+
+            tasks.append((process_neutron,
+                          (filename, dest_dir, args.libver,
+                           args.temperatures)))
+
+        for fname_neutron, fname_thermal in details['sab_files']:
+            tasks.append((process_thermal,
+                          (neutron_dir / fname_neutron,
+                           neutron_dir / fname_thermal,
+                           dest_dir, args.libver)))
+
+        # A previous run's failures can be retried on their own instead
+        # of reprocessing the entire library
+        failed_path = args.destination / 'failed.json'
+        if args.retry_failed and failed_path.is_file():
+            with open(failed_path) as fh:
+                retry = {entry['input'] for entry in json.load(fh)}
+            tasks = [t for t in tasks if str(task_input(t)) in retry]
+            print(f'Retrying {len(tasks)} previously failed files')
+
+        # Longest jobs first, one task per dispatch: the heavyweight
+        # evaluations (U238, graphite, ...) start immediately and short
+        # jobs backfill the pool, instead of one slow straggler running
+        # alone at the end. NJOY runtime correlates with input file size.
+        tasks.sort(key=lambda t: task_input(t).stat().st_size, reverse=True)
+
+        # imap_unordered streams results back as tasks finish; failures
+        # are collected rather than aborting the remaining files
+        failures = []
+        for input_file, error in pool.imap_unordered(process_star, tasks,
+                                                     chunksize=1):
+            if error is not None:
+                failures.append({'input': input_file, 'error': error})
+
+        if failures:
+            with open(failed_path, 'w') as fh:
+                json.dump(failures, fh, indent=2)
+            print(f'{len(failures)} file(s) failed to process; inputs '
+                  f'recorded in {failed_path}, re-run with --retry-failed')
+        elif failed_path.is_file():
+            failed_path.unlink()
+
+        for p in sorted(dest_dir.glob('*.h5'), key=sort_key):
             library.register_file(p)
 
 
@@ -334,18 +549,15 @@ def main():
 
     if 'photon' in args.particles:
         particle = 'photon'
-        details = release_details[args.release][particle]
-        for photo_path, atom_path in zip(sorted(details['photo_files']),
-                                        sorted(details['atom_files'])):
-            # Generate instance of IncidentPhoton
-            print('Converting:', photo_path.name, atom_path.name)
-            data = openmc.data.IncidentPhoton.from_endf(photo_path, atom_path)
-
-            # Export HDF5 file
-            h5_file = args.destination / particle / f'{data.name}.h5'
-            data.export_to_hdf5(h5_file, 'w', libver=args.libver)
-
-            # Register with library
+        photo_files, atom_files = resolve_files(particle, 'photo_files',
+                                                'atom_files')
+        dest_dir = args.destination / particle
+        tasks = [(photo_path, atom_path, dest_dir, args.libver)
+                 for photo_path, atom_path in zip(photo_files, atom_files)]
+
+        # Each element is independent, so convert across the worker pool
+        # and register the resulting files in a deterministic order
+        for h5_file in sorted(pool.starmap(process_photon, tasks)):
             library.register_file(h5_file)
 
     # =========================================================================
@@ -355,6 +567,9 @@ def main():
         for h5_file in sorted(Path(args.destination / 'wmp').rglob('*.h5')):
             library.register_file(h5_file)
 
+    pool.close()
+    pool.join()
+
     # Write cross_sections.xml
     library.export_to_xml(args.destination / 'cross_sections.xml')
 
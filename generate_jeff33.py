@@ -14,6 +14,7 @@ import sys
 import tarfile
 import tempfile
 import zipfile
+from functools import lru_cache
 from multiprocessing import Pool
 from pathlib import Path
 from urllib.parse import urljoin
@@ -60,12 +61,18 @@ def main():
     parser.set_defaults(download=True, extract=True, tmpdir=True)
     args = parser.parse_args()
 
+    @lru_cache(maxsize=None)
+    def _zam(stem):
+        # zam() regex-parses the nuclide name; memoize so each stem is
+        # parsed at most once no matter how often it is sorted
+        return openmc.data.zam(stem)
+
     def sort_key(path):
         if path.name.startswith('c_'):
             # Ensure that thermal scattering gets sorted after neutron data
             return (1000, path)
         else:
-            return openmc.data.zam(path.stem)
+            return _zam(path.stem)
 
 
     base_endf = 'https://www.nndc.bnl.gov/endf-b8.0/zips/'
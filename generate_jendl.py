@@ -6,16 +6,22 @@ use with OpenMC.
 """
 
 import argparse
+import os
 import ssl
+import subprocess
 import tarfile
 import gzip
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
+from http.client import HTTPException
 from multiprocessing import Pool
 from pathlib import Path
-from shutil import rmtree, copyfileobj
-from urllib.parse import urljoin
+from shutil import rmtree, copyfileobj, which
+from urllib.parse import urljoin, urlparse
+from urllib.request import urlopen
 
 import openmc.data
-from utils import download, process_neutron
+from utils import download_all, process_neutron, stream_download_and_extract
 
 
 class CustomFormatter(argparse.ArgumentDefaultsHelpFormatter,
@@ -23,6 +29,101 @@ class CustomFormatter(argparse.ArgumentDefaultsHelpFormatter,
     pass
 
 
+def stream_extract(url, dest_dir, context=None, attempts=3):
+    """Extract a remote archive while it downloads, so the compressed
+    bytes never touch the disk. The JENDL tarballs go through the shared
+    streaming helper (flattening their internal folder structure); the
+    plain .gz update files are decompressed directly."""
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    fname = Path(urlparse(url).path).name
+    if fname.endswith('.tar.gz'):
+        stream_download_and_extract(url, dest_dir, context, attempts,
+                                    flatten=True)
+        return
+    kwargs = {} if context is None else {'context': context}
+    for attempt in range(attempts):
+        try:
+            print('Downloading and extracting {}...'.format(fname))
+            with urlopen(url, **kwargs) as response:
+                source = gzip.open(response)
+                target = open(dest_dir / fname.rsplit('.', 1)[0], 'wb')
+                with source, target:
+                    copyfileobj(source, target)
+            return
+        except (OSError, EOFError, HTTPException) as e:
+            # A transfer cut off mid-stream surfaces through whichever
+            # layer hits the truncation first, and only some of those
+            # are OSErrors
+            if attempt == attempts - 1:
+                raise
+            print('Transfer of {} failed ({}), retrying...'.format(url, e))
+
+
+# Invariant processing arguments, stashed per worker by worker_init so
+# each submitted task only pickles the input path
+_destination = None
+_libver = None
+_temperatures = None
+
+
+def worker_init(destination, libver, temperatures):
+    """Pay the heavy openmc import once per worker instead of once per
+    submitted task, and stash the arguments shared by every task as
+    module globals."""
+    global _destination, _libver, _temperatures
+    import openmc.data  # noqa: F401
+    _destination, _libver, _temperatures = destination, libver, temperatures
+
+
+def process_neutron_file(filename):
+    """Process one neutron evaluation using the worker's stashed
+    invariant arguments, returning (h5_file, error) so one failing
+    evaluation doesn't abort the rest of the run."""
+    try:
+        h5_file = process_neutron(filename, _destination, _libver,
+                                  _temperatures)
+    except Exception as e:
+        return None, (filename, repr(e))
+    return h5_file, None
+
+
+def extract_archive(archive_path, dest_dir):
+    """Extract one downloaded archive into dest_dir: tarballs are
+    unpacked ignoring their internal folder structure, plain .gz files
+    are decompressed alongside them."""
+    archive_path = Path(archive_path)
+    fname = archive_path.name
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    if fname.endswith('.tar.gz'):
+        print('Extracting {}...'.format(fname))
+        pigz = which('pigz')
+        if pigz is not None:
+            # pigz inflates with all cores; pipe its output through
+            # tarfile's streaming reader so members are written out as
+            # they decompress
+            proc = subprocess.Popen([pigz, '-dc', str(archive_path)],
+                                    stdout=subprocess.PIPE)
+            tar_kwargs = {'fileobj': proc.stdout, 'mode': 'r|'}
+        else:
+            proc = None
+            tar_kwargs = {'name': archive_path, 'mode': 'r'}
+        with tarfile.open(**tar_kwargs) as tgz:
+            # extract files ignoring internal folder structure
+            for member in tgz:
+                if member.isreg():
+                    member.name = Path(member.name).name
+                    tgz.extract(member, path=dest_dir)
+        if proc is not None:
+            proc.stdout.close()
+            if proc.wait() != 0:
+                raise OSError('pigz failed on {}'.format(archive_path))
+    else:
+        source = gzip.open(archive_path)
+        target = open(dest_dir / fname.rsplit('.', 1)[0], 'wb')
+        with source, target:
+            copyfileobj(source, target)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description=__doc__,
@@ -75,8 +176,11 @@ def main():
         '4.0': {
             'base_url': 'https://wwwndc.jaea.go.jp/ftpnd/ftp/JENDL/',
             'compressed_files': ['jendl40-or-up_20160106.tar.gz'],
-            'endf_files': endf_files_dir.joinpath('jendl40-or-up_20160106').glob('*.dat'),
-            'metastables': endf_files_dir.joinpath('jendl40-or-up_20160106').glob('*m.dat'),
+            # Extraction flattens member names into endf_files_dir
+            # itself, so that is where the .dat files land
+            'endf_dir': endf_files_dir,
+            'endf_files': '*.dat',
+            'metastables': '*m.dat',
             'compressed_file_size': '0.2 GB',
             'uncompressed_file_size': '2 GB'
         },
@@ -85,8 +189,9 @@ def main():
             'compressed_files': ['ftp/JENDL/jendl5-n.tar.gz',
                                 'jendl/jendl5-update/data/jendl5_upd6.tar.gz',
                                 'jendl/jendl5-update/data/n_059-Pr-141.dat.gz'],
-            'endf_files': endf_files_dir.glob('*.dat'),
-            'metastables': endf_files_dir.glob('*m1.dat'),
+            'endf_dir': endf_files_dir,
+            'endf_files': '*.dat',
+            'metastables': '*m1.dat',
             'compressed_file_size': '4.1 GB',
             'uncompressed_file_size': '16 GB'
         }
@@ -103,60 +208,100 @@ def main():
 
     if args.download:
         print(download_warning)
-        for f in release_details[args.release]['compressed_files']:
-            # Establish connection to URL
-            download(urljoin(release_details[args.release]['base_url'], f),
-                    context=ssl._create_unverified_context(),
-                    output_path=download_path)
-
-    # ==============================================================================
-    # EXTRACT FILES FROM TGZ
-    if args.extract:
-        for f in release_details[args.release]['compressed_files']:
-            fname = Path(f).parts[-1]
-            if fname.endswith('.tar.gz'):
-                with tarfile.open(download_path / fname, 'r') as tgz:
-                    print('Extracting {}...'.format(fname))
-                    # extract files ignoring internal folder structure
-                    for member in tgz.getmembers():
-                        if member.isreg():
-                            member.name = Path(member.name).name
-                            tgz.extract(member, path=endf_files_dir)
-
-            else:
-                # get the file name
-                filename = Path(download_path / fname)
-                source = gzip.open(filename)
-                target = open(endf_files_dir / filename.name.rsplit('.', 1)[0], 'wb')
-                with source, target:
-                    copyfileobj(source, target)
+        # One SSL context for the whole batch
+        context = ssl._create_unverified_context()
+        urls = [urljoin(release_details[args.release]['base_url'], f)
+                for f in release_details[args.release]['compressed_files']]
+        if args.extract:
+            # Stream each archive straight into the extractor: the
+            # compressed tarball never touches the disk, saving a full
+            # write+read pass over gigabytes of compressed bytes. The
+            # first URL is the base library and the rest are updates
+            # whose flattened member names overwrite base evaluations,
+            # so the base must finish before any update starts; the
+            # updates then stream concurrently with each other.
+            stream_extract(urls[0], endf_files_dir, context)
+            if len(urls) > 1:
+                with ThreadPoolExecutor(len(urls) - 1) as executor:
+                    futures = [executor.submit(stream_extract, url,
+                                               endf_files_dir, context)
+                               for url in urls[1:]]
+                    for future in futures:
+                        future.result()
+        else:
+            # Keep the archives on disk for later --no-download runs;
+            # download_all shares one pooled session across the batch
+            download_all(urls, output_path=download_path, context=context)
+    elif args.extract:
+        # The first archive is the base library; the rest are updates
+        # whose flattened member names overwrite base evaluations, so
+        # the base must finish extracting before any update starts. The
+        # updates themselves are independent, so those still inflate
+        # across a process pool.
+        files = release_details[args.release]['compressed_files']
+        extract_archive(download_path / Path(files[0]).parts[-1],
+                        endf_files_dir)
+        tasks = [(download_path / Path(f).parts[-1], endf_files_dir)
+                 for f in files[1:]]
+        if tasks:
+            with Pool(min(len(tasks), os.cpu_count() or 1)) as pool:
+                pool.starmap(extract_archive, tasks)
 
-        if args.cleanup and download_path.exists():
-            rmtree(download_path)
+    if args.extract and args.cleanup and download_path.exists():
+        rmtree(download_path)
 
     # ==============================================================================
     # GENERATE HDF5 LIBRARY -- NEUTRON FILES
 
-    # Get a list of all ENDF files
-    neutron_files = release_details[args.release]['endf_files']
+    # Get a list of all ENDF files in a single directory read; the glob
+    # pattern is matched against each entry name rather than re-scanning
+    # the directory per pattern
+    details = release_details[args.release]
+    with os.scandir(details['endf_dir']) as it:
+        neutron_files = [Path(entry.path) for entry in it
+                         if fnmatch(entry.name, details['endf_files'])]
 
     # Create output directory if it doesn't exist
     args.destination.mkdir(parents=True, exist_ok=True)
 
     library = openmc.data.DataLibrary()
 
-    with Pool() as pool:
-        results = []
-        for filename in sorted(neutron_files):
-            func_args = (filename, args.destination, args.libver, args.temperatures)
-            r = pool.apply_async(process_neutron, func_args)
-            results.append(r)
+    # NJOY processing is memory-bandwidth heavy: one worker per physical
+    # core (half the SMT thread count) avoids cache thrash, and
+    # recycling workers every few tasks bounds memory creep from
+    # openmc's per-evaluation caches. Keeping OpenMP/BLAS
+    # single-threaded stops library threads fighting the process-level
+    # parallelism.
+    os.environ.setdefault('OMP_NUM_THREADS', '1')
+    if hasattr(os, 'sched_getaffinity'):
+        n_workers = max(1, len(os.sched_getaffinity(0)) // 2)
+    else:
+        n_workers = max(1, (os.cpu_count() or 2) // 2)
+
+    with Pool(processes=n_workers, maxtasksperchild=8,
+              initializer=worker_init,
+              initargs=(args.destination, args.libver,
+                        args.temperatures)) as pool:
+        # The workers return the HDF5 paths they wrote, so collect them
+        # from the result stream rather than re-globbing the destination
+        # directory afterwards; failures are gathered rather than
+        # aborting the remaining files
+        h5_paths, failures = [], []
+        for h5_file, error in pool.imap_unordered(process_neutron_file,
+                                                  sorted(neutron_files),
+                                                  chunksize=4):
+            if error is not None:
+                failures.append(error)
+            else:
+                h5_paths.append(h5_file)
 
-        for r in results:
-            r.wait()
+    if failures:
+        print('{} file(s) failed to process:'.format(len(failures)))
+        for filename, error in failures:
+            print('  {}: {}'.format(filename, error))
 
     # Register with library
-    for p in sorted((args.destination).glob('*.h5')):
+    for p in sorted(h5_paths):
         library.register_file(p)
 
     # Write cross_sections.xml
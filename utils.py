@@ -1,16 +1,45 @@
+import asyncio
 import hashlib
+import os
+import tarfile
+import threading
 import warnings
-import openmc.data
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http.client import HTTPException
 from pathlib import Path
+from shutil import copyfileobj
+from urllib.error import HTTPError
 from urllib.parse import urlparse
 from urllib.request import urlopen, Request
+from zipfile import ZipFile
 
-_BLOCK_SIZE = 16384
+try:
+    import aiohttp
+    # The async path needs asyncio.TaskGroup (3.11+); older interpreters
+    # take the thread-pool fallback even with aiohttp installed
+    _have_aiohttp = hasattr(asyncio, 'TaskGroup')
+except ImportError:
+    _have_aiohttp = False
+
+try:
+    from isal import igzip
+    _have_isal = True
+except ImportError:
+    _have_isal = False
+
+try:
+    import lxml.etree
+    _have_lxml = True
+except ImportError:
+    _have_lxml = False
+
+_BLOCK_SIZE = 1024 * 1024
 
 
 def process_neutron(path, output_dir, libver, temperatures=None):
     """Process ENDF neutron sublibrary file into HDF5 and write into a
-    specified output directory."""
+    specified output directory, returning the path of the file written."""
+    import openmc.data
     print(f'Converting: {path}')
     try:
         with warnings.catch_warnings():
@@ -24,11 +53,13 @@ def process_neutron(path, output_dir, libver, temperatures=None):
     h5_file = output_dir / f'{data.name}.h5'
     print(f'Writing {h5_file} ...')
     data.export_to_hdf5(h5_file, 'w', libver=libver)
+    return h5_file
 
 
 def process_thermal(path_neutron, path_thermal, output_dir, libver):
     """Process ENDF thermal scattering sublibrary file into HDF5 and write into a
-    specified output directory."""
+    specified output directory, returning the path of the file written."""
+    import openmc.data
     print(f'Converting: {path_thermal}')
     try:
         with warnings.catch_warnings():
@@ -42,9 +73,71 @@ def process_thermal(path_neutron, path_thermal, output_dir, libver):
     h5_file = output_dir / f'{data.name}.h5'
     print(f'Writing {h5_file} ...')
     data.export_to_hdf5(h5_file, 'w', libver=libver)
+    return h5_file
+
 
+def _verify_checksum(local_path, checksum, md5_path):
+    """Check a file against an expected MD5, caching the digest in a
+    sidecar file so later runs can skip the re-hash."""
+    # Hash incrementally rather than reading the whole archive into
+    # memory; file_digest streams through OpenSSL's vectorized MD5
+    # and releases the GIL while hashing
+    with open(local_path, 'rb', buffering=0) as fh:
+        if hasattr(hashlib, 'file_digest'):  # Python 3.11+
+            downloadsum = hashlib.file_digest(fh, 'md5').hexdigest()
+        else:
+            digest = hashlib.md5()
+            buf = bytearray(_BLOCK_SIZE)
+            view = memoryview(buf)
+            while (n := fh.readinto(buf)):
+                digest.update(view[:n])
+            downloadsum = digest.hexdigest()
+    if downloadsum != checksum:
+        raise OSError("MD5 checksum for {} does not match. If this is "
+                      "your first time receiving this message, please "
+                      "re-run the script. Otherwise, please contact "
+                      "OpenMC developers by emailing "
+                      "openmc-users@googlegroups.com.".format(local_path))
+    md5_path.write_text(downloadsum + '\n')
+
+
+def _download_ranges(url, local_path, file_size, parts, headers, **kwargs):
+    """Fetch a file as several concurrent HTTP range requests, each
+    streaming into its own slice of the preallocated output file via
+    positioned writes."""
+    fd = os.open(local_path, os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 0o644)
+    try:
+        os.ftruncate(fd, file_size)
 
-def download(url, checksum=None, as_browser=False, output_path=None, **kwargs):
+        def fetch_part(lo, hi):
+            part_headers = dict(headers)
+            part_headers['Range'] = 'bytes={}-{}'.format(lo, hi)
+            with urlopen(Request(url, headers=part_headers),
+                         **kwargs) as response:
+                offset = lo
+                buf = bytearray(_BLOCK_SIZE)
+                view = memoryview(buf)
+                while True:
+                    n = response.readinto(buf)
+                    if not n:
+                        break
+                    os.pwrite(fd, view[:n], offset)
+                    offset += n
+
+        step = -(-file_size // parts)
+        with ThreadPoolExecutor(parts) as executor:
+            futures = [
+                executor.submit(fetch_part, lo,
+                                min(lo + step, file_size) - 1)
+                for lo in range(0, file_size, step)]
+            for future in futures:
+                future.result()
+    finally:
+        os.close(fd)
+
+
+def download(url, checksum=None, as_browser=False, output_path=None,
+             parts=1, **kwargs):
     """Download file from a URL
 
     Parameters
@@ -57,6 +150,11 @@ def download(url, checksum=None, as_browser=False, output_path=None, **kwargs):
         Change User-Agent header to appear as a browser
     output_path : str or Path
         Specifies a location to save the downloaded file
+    parts : int
+        Number of concurrent HTTP range requests to split the transfer
+        into. The default of 1 downloads in a single stream; higher
+        values can help on high-latency links when the server supports
+        range requests.
     kwargs : dict
         Keyword arguments passed to :func:`urllib.request.urlopen`
 
@@ -66,47 +164,395 @@ def download(url, checksum=None, as_browser=False, output_path=None, **kwargs):
         Name of file written locally
 
     """
-    if as_browser:
-        page = Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-    else:
-        page = url
+    headers = {'User-Agent': 'Mozilla/5.0'} if as_browser else {}
 
-    with urlopen(page, **kwargs) as response:
-        # Get file size from header
-        file_size = response.length
+    local_path = Path(Path(urlparse(url).path).name)
+    if output_path is not None:
+        Path(output_path).mkdir(parents=True, exist_ok=True)
+        local_path = output_path / local_path
 
-        local_path = Path(Path(urlparse(url).path).name)
-        if output_path is not None:
-            Path(output_path).mkdir(parents=True, exist_ok=True)
-            local_path = output_path / local_path
-        # Check if file already downloaded
-        if local_path.is_file():
-            if local_path.stat().st_size == file_size:
+    # A sidecar file caches the verified MD5 of a finished download, so
+    # repeated runs skip both the HTTP request and the full re-hash
+    md5_path = local_path.with_suffix(local_path.suffix + '.md5')
+    if checksum is not None and local_path.is_file() and md5_path.is_file():
+        if md5_path.read_text().strip() == checksum:
+            print('Skipping {}, already downloaded and verified'
+                  .format(local_path))
+            return local_path
+
+    if parts > 1:
+        # Probe the size and range support up front; fall back to the
+        # single-stream path when the server offers neither
+        with urlopen(Request(url, headers=headers, method='HEAD'),
+                     **kwargs) as response:
+            # http.client zeroes response.length for HEAD responses, so
+            # the size has to come from the raw header
+            file_size = int(response.headers.get('Content-Length', 0))
+            ranged = response.headers.get('Accept-Ranges') == 'bytes'
+        if file_size and ranged:
+            if local_path.is_file() and \
+                    local_path.stat().st_size == file_size:
+                print('Skipping {}, already downloaded'.format(local_path))
+            else:
+                print('Downloading {} in {} parts...'.format(
+                    local_path, parts))
+                _download_ranges(url, local_path, file_size, parts,
+                                 headers, **kwargs)
+            if checksum is not None:
+                _verify_checksum(local_path, checksum, md5_path)
+            return local_path
+
+    # If a local copy exists, ask the server for the remaining bytes only
+    local_size = local_path.stat().st_size if local_path.is_file() else 0
+    if local_size:
+        headers['Range'] = 'bytes={}-'.format(local_size)
+
+    try:
+        response = urlopen(Request(url, headers=headers), **kwargs)
+    except HTTPError as e:
+        if local_size and e.code == 416:
+            # Requested range not satisfiable: the local copy is complete
+            print('Skipping {}, already downloaded'.format(local_path))
+            return local_path
+        raise
+
+    with response:
+        if local_size and response.status == 206:
+            # Server honored the range request; append the remainder
+            file_size = local_size + response.length
+            mode = 'ab'
+            print('Resuming {} at byte {}... '.format(local_path, local_size),
+                  end='')
+        else:
+            # Fresh download, or the server ignored the Range header
+            file_size = response.length
+            if local_size == file_size:
                 print('Skipping {}, already downloaded'.format(local_path))
                 return local_path
+            local_size = 0
+            mode = 'wb'
+            print('Downloading {}... '.format(local_path), end='')
 
-        # Copy file to disk in chunks
-        print('Downloading {}... '.format(local_path), end='')
-        downloaded = 0
-        with open(local_path, 'wb') as fh:
+        # Copy file to disk in chunks, reusing a single buffer so each
+        # block is one read and one write with no per-chunk allocation
+        downloaded = local_size
+        buf = bytearray(_BLOCK_SIZE)
+        view = memoryview(buf)
+        with open(local_path, mode) as fh:
             while True:
-                chunk = response.read(_BLOCK_SIZE)
-                if not chunk:
+                n = response.readinto(buf)
+                if not n:
                     break
-                fh.write(chunk)
-                downloaded += len(chunk)
+                fh.write(view[:n])
+                downloaded += n
                 status = '{:10}  [{:3.2f}%]'.format(
                     downloaded, downloaded * 100. / file_size)
                 print(status + '\b'*len(status), end='', flush=True)
             print('')
 
     if checksum is not None:
-        downloadsum = hashlib.md5(open(local_path, 'rb').read()).hexdigest()
-        if downloadsum != checksum:
-            raise OSError("MD5 checksum for {} does not match. If this is "
-                          "your first time receiving this message, please "
-                          "re-run the script. Otherwise, please contact "
-                          "OpenMC developers by emailing "
-                          "openmc-users@googlegroups.com.".format(local_path))
+        _verify_checksum(local_path, checksum, md5_path)
 
     return local_path
+
+
+def chain_cache_path(files):
+    """Return on-disk cache location for a depletion chain built from files
+
+    The location is keyed by the path, size, and mtime of every input
+    file, so any change to the inputs yields a fresh cache entry.
+
+    Parameters
+    ----------
+    files : iterable of str or Path
+        ENDF files the chain is built from
+
+    Returns
+    -------
+    pathlib.Path
+        Path of the cache entry (may not exist yet)
+
+    """
+    key = hashlib.sha256()
+    for p in sorted(str(f) for f in files):
+        st = os.stat(p)
+        key.update(f'{p}:{st.st_size}:{st.st_mtime_ns}'.encode())
+    cache_dir = Path(os.environ.get('XDG_CACHE_HOME',
+                                    Path.home() / '.cache')) / 'openmc_chain'
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir / f'{key.hexdigest()}.pkl'
+
+
+def scan_files(directory, suffix):
+    """Recursively list files with a given suffix in one directory walk
+
+    Unlike Path.glob/rglob, each directory is read exactly once and no
+    per-entry stat calls are made.
+
+    Parameters
+    ----------
+    directory : str or Path
+        Directory to search
+    suffix : str
+        Filename ending to match, e.g. '.endf'
+
+    Returns
+    -------
+    list of pathlib.Path
+        Sorted paths of all matching files
+
+    """
+    matches = []
+    for root, _dirs, names in os.walk(directory):
+        root = Path(root)
+        for name in names:
+            if name.endswith(suffix):
+                matches.append(root / name)
+    return sorted(matches)
+
+
+def export_chain_xml(chain, path):
+    """Write a depletion chain to XML, streaming when lxml is available
+
+    With lxml installed, each nuclide element is serialized to disk as
+    it is produced instead of first assembling the full document tree,
+    roughly halving peak memory for large chains. Falls back to
+    chain.export_to_xml otherwise.
+
+    Parameters
+    ----------
+    chain : openmc.deplete.Chain
+        Chain to serialize
+    path : str or Path
+        Path of the XML file to write
+
+    """
+    if not _have_lxml:
+        chain.export_to_xml(path)
+        return
+
+    import xml.etree.ElementTree as ET
+
+    print(f'Writing {path}...')
+    with lxml.etree.xmlfile(str(path), encoding='utf-8') as xf:
+        with xf.element('depletion_chain'):
+            for nuclide in chain.nuclides:
+                elem = nuclide.to_xml_element()
+                xf.write(lxml.etree.fromstring(ET.tostring(elem)))
+
+
+def extract(filename, path=".", verbose=True):
+    """Extract a zip or tar archive, writing members in parallel
+
+    Parameters
+    ----------
+    filename : str or Path
+        Path of the archive to extract
+    path : str or Path
+        Directory to extract the archive into
+    verbose : bool
+        Whether to print a message for the archive
+
+    """
+    filename = Path(filename)
+    if verbose:
+        print(f'Extracting {filename}...')
+
+    max_workers = min(32, (os.cpu_count() or 1) * 4)
+
+    if filename.suffix == '.zip':
+        with ZipFile(filename, 'r') as zf:
+            members = [m for m in zf.infolist() if not m.is_dir()]
+
+            # Create each unique parent directory once up front so the
+            # workers never race on os.makedirs
+            for parent in {(Path(path) / m.filename).parent for m in members}:
+                parent.mkdir(parents=True, exist_ok=True)
+
+            def extract_member(m):
+                with zf.open(m) as src, \
+                        open(Path(path) / m.filename, 'wb') as dst:
+                    copyfileobj(src, dst, 16*1024*1024)
+
+            with ThreadPoolExecutor(max_workers) as executor:
+                for _ in executor.map(extract_member, members):
+                    pass
+    else:
+        # Decompression is inherently serial, so read member contents on
+        # the main thread and fan the file writes out to workers. A
+        # semaphore bounds how many member buffers are in flight at once.
+        sem = threading.BoundedSemaphore(2 * max_workers)
+
+        def write_member(target, data):
+            try:
+                target.write_bytes(data)
+            finally:
+                sem.release()
+
+        # Feed the decompressor through a large buffered reader so the
+        # archive is consumed in few big sequential reads
+        fileobj = open(filename, 'rb', buffering=4*1024*1024)
+        if hasattr(os, 'posix_fadvise'):
+            # Tell the kernel to read ahead aggressively
+            os.posix_fadvise(fileobj.fileno(), 0, 0,
+                             os.POSIX_FADV_SEQUENTIAL)
+        if _have_isal and filename.name.endswith(('.tar.gz', '.tgz')):
+            # ISA-L's SIMD inflate is 2-3x faster than stdlib gzip; use
+            # streaming mode so members are handled as they decompress
+            fileobj = igzip.IGzipFile(fileobj=fileobj)
+            mode = 'r|'
+        else:
+            mode = 'r'
+        with tarfile.open(fileobj=fileobj, mode=mode) as tar, \
+                ThreadPoolExecutor(max_workers) as executor:
+            dirs_made = set()
+            futures = []
+            for member in tar:
+                if member.isreg():
+                    target = Path(path) / member.name
+                    parent = target.parent
+                    if parent not in dirs_made:
+                        parent.mkdir(parents=True, exist_ok=True)
+                        dirs_made.add(parent)
+                    data = tar.extractfile(member).read()
+                    sem.acquire()
+                    futures.append(executor.submit(write_member, target, data))
+                else:
+                    tar.extract(member, path)
+            # Surface any write failure (disk full, permissions, ...)
+            # instead of returning success with missing members
+            for future in futures:
+                future.result()
+
+
+def stream_download_and_extract(url, path=".", context=None, attempts=3,
+                                flatten=False):
+    """Extract a remote tar archive while it downloads
+
+    The HTTP response body is piped straight into tarfile's streaming
+    reader, so the compressed archive is never written to disk. Only
+    works for tar archives since zip files require seeking.
+
+    Parameters
+    ----------
+    url : str
+        URL of a .tar.gz/.tgz archive
+    path : str or Path
+        Directory to extract the archive into
+    context : ssl.SSLContext or None
+        SSL context to use for the connection
+    attempts : int
+        Number of times to retry on a failed transfer
+    flatten : bool
+        Whether to discard the archive's internal folder structure and
+        write every member directly into ``path``
+
+    """
+    kwargs = {} if context is None else {'context': context}
+    for attempt in range(attempts):
+        try:
+            print(f'Downloading and extracting {url}...')
+            with urlopen(url, **kwargs) as response:
+                if _have_isal:
+                    fileobj = igzip.IGzipFile(fileobj=response)
+                    mode = 'r|'
+                else:
+                    fileobj = response
+                    mode = 'r|gz'
+                with tarfile.open(fileobj=fileobj, mode=mode) as tar:
+                    if flatten:
+                        for member in tar:
+                            if member.isreg():
+                                member.name = Path(member.name).name
+                                tar.extract(member, path)
+                    else:
+                        tar.extractall(path)
+            return
+        except (OSError, EOFError, HTTPException, tarfile.ReadError) as e:
+            # A transfer cut off mid-stream surfaces through whichever
+            # layer hits the truncation first: the socket (OSError), the
+            # decompressor (EOFError), http.client (IncompleteRead), or
+            # the tar reader (ReadError)
+            if attempt == attempts - 1:
+                raise
+            print(f'Transfer of {url} failed ({e}), retrying...')
+
+
+async def _download_all_async(urls, output_path=None, context=None,
+                              on_complete=None):
+    """Download several URLs concurrently sharing one aiohttp session."""
+    async def fetch(session, url):
+        local_path = Path(Path(urlparse(url).path).name)
+        if output_path is not None:
+            Path(output_path).mkdir(parents=True, exist_ok=True)
+            local_path = output_path / local_path
+
+        async with session.get(url, ssl=context) as response:
+            # Check if file already downloaded
+            file_size = response.content_length
+            if local_path.is_file() and local_path.stat().st_size == file_size:
+                print('Skipping {}, already downloaded'.format(local_path))
+            else:
+                print('Downloading {}...'.format(local_path))
+                with open(local_path, 'wb') as fh:
+                    async for chunk in response.content.iter_chunked(_BLOCK_SIZE):
+                        fh.write(chunk)
+
+        if on_complete is not None:
+            # Process the finished file in a worker thread so remaining
+            # downloads keep the network busy while it runs
+            await asyncio.to_thread(on_complete, local_path)
+        return local_path
+
+    # One pooled session for the whole batch: downloads from the same
+    # host (NNDC, JAEA, ...) reuse kept-alive connections rather than
+    # paying a TCP+TLS handshake per file
+    connector = aiohttp.TCPConnector(limit=16, limit_per_host=8)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(fetch(session, url)) for url in urls]
+    return [t.result() for t in tasks]
+
+
+def download_all(urls, output_path=None, context=None, on_complete=None):
+    """Download multiple files, concurrently when aiohttp is available
+
+    Parameters
+    ----------
+    urls : iterable of str
+        URLs from which to download
+    output_path : str or Path
+        Specifies a location to save the downloaded files
+    context : ssl.SSLContext or None
+        SSL context to use for the connections
+    on_complete : callable or None
+        Function called with the local path of each file as soon as its
+        download finishes, overlapping with the remaining downloads
+
+    Returns
+    -------
+    local_paths : list of pathlib.Path
+        Names of files written locally, in the same order as the URLs
+
+    """
+    urls = list(urls)
+    if _have_aiohttp:
+        return asyncio.run(
+            _download_all_async(urls, output_path, context, on_complete))
+    else:
+        # Fall back to a thread pool: transfers release the GIL, so a
+        # few concurrent download() calls still overlap TCP/TLS setup
+        # and server-side reads even without aiohttp
+        kwargs = {} if context is None else {'context': context}
+        paths = [None] * len(urls)
+        with ThreadPoolExecutor(max(1, min(6, len(urls)))) as executor:
+            futures = {
+                executor.submit(download, url, output_path=output_path,
+                                **kwargs): i
+                for i, url in enumerate(urls)}
+            for fut in as_completed(futures):
+                local_path = fut.result()
+                if on_complete is not None:
+                    on_complete(local_path)
+                paths[futures[fut]] = local_path
+        return paths